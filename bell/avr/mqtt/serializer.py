@@ -4,13 +4,25 @@ MQTT payloads.
 """
 
 import json
-from typing import Any
+from typing import Any, Callable, Dict, Type, cast
 
 import pydantic
 
 from bell.avr.mqtt.constants import MQTTTopicPayload
 from bell.avr.mqtt.payloads import AVREmptyMessage
 
+# empty messages carry no data and are frozen, so one instance is shared
+# rather than building a new one for every empty payload
+_EMPTY_MESSAGE = AVREmptyMessage()
+
+# the same dict as MQTTTopicPayload. Its TypedDict type only allows literal topic
+# keys, so cast it once for looking up arbitrary topic strings
+_TOPIC_TO_MODEL = cast(Dict[str, Type[pydantic.BaseModel]], MQTTTopicPayload)
+
+
+# raw payloads that decode to an empty message
+_EMPTY_JSON = {None, "", b"", "{}", b"{}"}
+
 
 def deserialize_payload(topic: str, payload: bytes) -> Any:
     """
@@ -23,61 +35,104 @@ def deserialize_payload(topic: str, payload: bytes) -> Any:
     and the payload does not match the required schema.
     """
 
-    # so json.loads doesn't choke on an empty string
+    klass = _TOPIC_TO_MODEL.get(topic)
+
+    # empty payloads for topics that expect nothing, or that we don't know about
+    if (klass is None or klass is AVREmptyMessage) and payload in _EMPTY_JSON:
+        return _EMPTY_MESSAGE
+
+    # so the JSON parser doesn't choke on an empty string
     if payload in {None, "", b""}:
         payload = b"{}"
 
+    # load the json into a pydantic model. pydantic parses and
+    # validates in one go, without building an intermediate dict
+    if klass is not None:
+        return klass.model_validate_json(payload)
+
     # we talk JSON, no exceptions
     payload = json.loads(payload)
 
-    # load the json into a pydantic model
-    if topic in MQTTTopicPayload:
-        return MQTTTopicPayload[topic](**payload)
-
     # if we have an empty dict, manually convert it
-    elif payload == {}:
-        return AVREmptyMessage()
+    if payload == {}:
+        return _EMPTY_MESSAGE
 
     # whatever the user gave us
     return payload
 
 
-def serialize_payload(topic: str, payload: Any) -> str:
-    """
-    Serializes a payload into a string we can send over MQTT. If the topic is
-    not known, serialized JSON will be returned.
+# payloads that are treated as an empty message
+_EMPTY_PAYLOADS = [None, "", b"", {}]
 
-    A `ValueError` will be raised if the payload is a string or bytes
-    and is not valid JSON.
 
-    Additionally, a `ValueError` will be raised if the given topic is known
-    and the payload does not match the required schema.
+def _serialize_unknown(payload: Any) -> str:
+    """
+    Serializes a payload for a topic without a known payload class.
     """
+    # pydantic models first, as they are the most common
+    if isinstance(payload, pydantic.BaseModel):
+        return payload.model_dump_json()
 
     # if no payload given, use empty message
-    if payload in [None, "", b"", {}]:
-        payload = AVREmptyMessage()
+    if payload in _EMPTY_PAYLOADS:
+        return _EMPTY_MESSAGE.model_dump_json()
 
     # first, convert to a dict if appropriate
     if isinstance(payload, (str, bytes)):
         payload = json.loads(payload)
 
-    # if this is a known topic
-    if topic in MQTTTopicPayload:
-        klass = MQTTTopicPayload[topic]
+    # convert any other data type to json
+    return json.dumps(payload)
+
+
+def _known_topic_serializer(
+    topic: str, klass: Type[pydantic.BaseModel]
+) -> Callable[[Any], str]:
+    """
+    Builds a serializer for a topic with a known payload class.
+    """
+    wrong_type_message = f"{topic} payload must be of type {klass}"
 
+    def serialize(payload: Any) -> str:
         # if payload is already a pydantic model, check to make sure it's the right
-        # one
-        if isinstance(payload, pydantic.BaseModel) and not isinstance(payload, klass):
-            raise ValueError(f"{topic} payload must be of type {klass}")
+        # one. Checked first, as this is the most common case
+        if isinstance(payload, pydantic.BaseModel):
+            if not isinstance(payload, klass):
+                raise ValueError(wrong_type_message)
 
-        # if not, convert to a pydantic model
-        if not isinstance(payload, pydantic.BaseModel):
-            payload = MQTTTopicPayload[topic](**payload)
+            return payload.model_dump_json()
 
-    # convert pydantic models to json
-    if isinstance(payload, pydantic.BaseModel):
-        return payload.model_dump_json()
+        # if no payload given, use empty message
+        if payload in _EMPTY_PAYLOADS:
+            return serialize(_EMPTY_MESSAGE)
 
-    # convert any other data type to json
-    return json.dumps(payload)
+        # first, convert to a dict if appropriate
+        if isinstance(payload, (str, bytes)):
+            payload = json.loads(payload)
+
+        # convert to a pydantic model, then to json
+        return klass(**payload).model_dump_json()
+
+    return serialize
+
+
+# serializer for each known topic, so publishing doesn't need to work out
+# what kind of topic it has every time
+_TOPIC_SERIALIZERS: Dict[str, Callable[[Any], str]] = {
+    topic: _known_topic_serializer(topic, klass)
+    for topic, klass in _TOPIC_TO_MODEL.items()
+}
+
+
+def serialize_payload(topic: str, payload: Any) -> str:
+    """
+    Serializes a payload into a string we can send over MQTT. If the topic is
+    not known, serialized JSON will be returned.
+
+    A `ValueError` will be raised if the payload is a string or bytes
+    and is not valid JSON.
+
+    Additionally, a `ValueError` will be raised if the given topic is known
+    and the payload does not match the required schema.
+    """
+    return _TOPIC_SERIALIZERS.get(topic, _serialize_unknown)(payload)
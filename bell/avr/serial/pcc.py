@@ -1,11 +1,81 @@
 import ctypes
-from struct import pack
+import functools
+from struct import Struct, pack
 from typing import Any, List, Literal, Optional, Tuple, Union
 
 import serial
 from loguru import logger
 
 
+def _crc8_dvb_s2_table() -> bytes:
+    """
+    Builds the CRC-8 DVB-S2 lookup table, one entry per byte value.
+    """
+    table = bytearray(256)
+    for a in range(256):
+        # https://stackoverflow.com/a/52997726
+        crc = a
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0xD5) % 256 if crc & 0x80 else (crc << 1) % 256
+        table[a] = crc
+    return bytes(table)
+
+
+# precomputed so checksums are a single lookup per byte, rather than 8 shifts
+_CRC8_DVB_S2_TABLE = _crc8_dvb_s2_table()
+
+
+def _calc_crc(data: Union[bytes, bytearray, memoryview], crc: int = 0) -> int:
+    """
+    Calculates the CRC-8 DVB-S2 checksum of the data. A previous checksum can be
+    given to continue from it.
+    """
+    for a in data:
+        crc = _CRC8_DVB_S2_TABLE[crc ^ a]
+    return crc
+
+
+# [$][P][>][LENGTH-HI][LENGTH-LOW][CODE]
+_HEADER_STRUCT = Struct(">3bHB")
+
+
+@functools.lru_cache(maxsize=None)
+def _data_struct(length: int) -> Struct:
+    """
+    Compiled struct for packing `length` bytes of data.
+    """
+    return Struct("<%dB" % length)
+
+
+@functools.lru_cache(maxsize=None)
+def _packet_prefix(header: Tuple[int, ...], code: int, size: int) -> Tuple[bytes, int]:
+    """
+    The packed start of a packet, and its checksum. These are the same for every
+    packet of a command, so are only computed once.
+    """
+    prefix = _HEADER_STRUCT.pack(*header, size, code)
+    return prefix, _calc_crc(prefix)
+
+
+@functools.lru_cache(maxsize=512)
+def _build_packet(header: Tuple[int, ...], code: int, size: int, body: bytes) -> bytes:
+    """
+    Builds a complete packet from already packed data. The same servo positions
+    and colors get sent over and over, so finished packets are cached.
+    """
+    # [$][P][>][LENGTH-HI][LENGTH-LOW][DATA][CRC]
+    prefix, prefix_crc = _packet_prefix(header, code, size)
+
+    # fill a single buffer of the final length, instead of concatenating
+    payload = bytearray(len(prefix) + len(body) + 1)
+    payload[: len(prefix)] = prefix
+    payload[len(prefix) : -1] = body
+    payload[-1] = _calc_crc(body, prefix_crc)
+
+    # packets are cached, so hand out an immutable copy
+    return bytes(payload)
+
+
 class PeripheralControlComputer:
     """
     The `PeripheralControlComputer` class sends serial messages
@@ -60,6 +130,18 @@ class PeripheralControlComputer:
             "CHECK_SERVO_CONTROLLER",
         ]
 
+        # commands that take no arguments always send the same packet,
+        # so build them once up front
+        self._constant_packets = {
+            command: self._construct_payload(self.commands.index(command), 1)
+            for command in (
+                "FIRE_LASER",
+                "SET_LASER_ON",
+                "SET_LASER_OFF",
+                "CHECK_SERVO_CONTROLLER",
+            )
+        }
+
         self.shutdown: bool = False
 
     def set_base_color(self, wrgb: Tuple[int, int, int, int]) -> None:
@@ -258,10 +340,7 @@ class PeripheralControlComputer:
         Fires the laser for a 0.25 second pulse. Has a cooldown of 0.5 seconds.
         """
 
-        command = self.commands.index("FIRE_LASER")
-
-        length = 1
-        data = self._construct_payload(command, length)
+        data = self._constant_packets["FIRE_LASER"]
 
         logger.debug(f"Setting the laser on: {data}")
         self.ser.write(data)
@@ -271,10 +350,7 @@ class PeripheralControlComputer:
         Turns laser on for 0.1 second every 0.5 seconds.
         """
 
-        command = self.commands.index("SET_LASER_ON")
-
-        length = 1
-        data = self._construct_payload(command, length)
+        data = self._constant_packets["SET_LASER_ON"]
 
         logger.debug(f"Setting the laser on: {data}")
         self.ser.write(data)
@@ -283,10 +359,7 @@ class PeripheralControlComputer:
         """
         Turns the laser off. Does not prevent `fire_laser`.
         """
-        command = self.commands.index("SET_LASER_OFF")
-
-        length = 1
-        data = self._construct_payload(command, length)
+        data = self._constant_packets["SET_LASER_OFF"]
 
         logger.debug(f"Setting the laser off: {data}")
         self.ser.write(data)
@@ -308,10 +381,7 @@ class PeripheralControlComputer:
         """
         Checks the servo controller.
         """
-        command = self.commands.index("CHECK_SERVO_CONTROLLER")
-
-        length = 1
-        data = self._construct_payload(command, length)
+        data = self._constant_packets["CHECK_SERVO_CONTROLLER"]
 
         logger.debug(f"Checking servo controller: {data}")
         self.ser.write(data)
@@ -319,44 +389,22 @@ class PeripheralControlComputer:
     def _construct_payload(
         self, code: int, size: int = 0, data: Optional[list] = None
     ) -> bytes:
-        # [$][P][>][LENGTH-HI][LENGTH-LOW][DATA][CRC]
-        payload = bytes()
-
         if data is None:
             data = []
 
-        new_data = (
-            ("<3b", self.HEADER_OUTGOING),
-            (">H", [size]),
-            ("<B", [code]),
-            ("<%dB" % len(data), data),
-        )
-
-        for section in new_data:
-            payload += pack(section[0], *section[1])
-
-        crc = self._calc_crc(payload, len(payload))
-
-        payload += pack("<B", crc)
-
-        return payload
+        # the data is packed before the packet cache is checked, so invalid values
+        # are always rejected, rather than matching an equal valid value
+        body = _data_struct(len(data)).pack(*data)
+        return _build_packet(self.HEADER_OUTGOING, code, size, body)
 
     def _list_pack(self, bit_format: Union[str, bytes], value: Any) -> List[int]:
         return list(pack(bit_format, value))
 
     def _crc8_dvb_s2(self, crc: int, a: int) -> int:
-        # https://stackoverflow.com/a/52997726
-        crc ^= a
-        for _ in range(8):
-            crc = ((crc << 1) ^ 0xD5) % 256 if crc & 0x80 else (crc << 1) % 256
-        return crc
+        return _CRC8_DVB_S2_TABLE[crc ^ a]
 
     def _calc_crc(self, string: bytes, length: int) -> int:
         """
         Calculates the crc for an input.
         """
-
-        crc = 0
-        for i in range(length):
-            crc = self._crc8_dvb_s2(crc, string[i])
-        return crc
+        return _calc_crc(string[:length])
@@ -59,12 +59,25 @@ def serialize_image(image: np.ndarray, compress: bool = False) -> ImageData:
     # record the shape before we start making changes
     shape = list(np.shape(image))
 
-    # round all of the items to integers
-    image_rounded = np.rint(image).astype(int)
-    # flatten the array
-    image_integer_list: List[int] = image_rounded.flatten().tolist()
-    # convert the flat integer list into a bytearray
-    image_byte_array = bytearray(image_integer_list)
+    # integers need no rounding, so only round everything else
+    image = np.asarray(image)
+    if np.issubdtype(image.dtype, np.integer):
+        image_rounded = image
+    else:
+        image_rounded = np.rint(image)
+        # NaN fails both of the range comparisons below, so check it separately
+        if not np.isfinite(image_rounded).all():
+            raise ValueError("byte must be in range(0, 256)")
+
+    # every value needs to fit in a single byte, which uint8 always does
+    if (
+        image_rounded.dtype != np.uint8
+        and image_rounded.size
+        and (image_rounded.min() < 0 or image_rounded.max() > 255)
+    ):
+        raise ValueError("byte must be in range(0, 256)")
+    # convert the array into a flat, C-ordered run of bytes in at most one copy
+    image_byte_array = image_rounded.astype(np.uint8, copy=False).tobytes(order="C")
 
     # compress with zlib if desired
     if compress:
@@ -101,9 +114,9 @@ def deserialize_image(image_data: Union[ImageData, _ImageDataProtocol]) -> np.nd
     if compressed:
         image_bytes = zlib.decompress(image_bytes)
 
-    # convert bytes to a byte array
+    # convert bytes to a (writable) byte array
     image_byte_array = bytearray(image_bytes)
-    # convert the byte array back into a numpy array
-    image_array = np.array(image_byte_array)
+    # view the byte array as a numpy array, without copying it again
+    image_array = np.frombuffer(image_byte_array, dtype=np.uint8)
 
     return np.reshape(image_array, shape)
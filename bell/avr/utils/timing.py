@@ -1,16 +1,22 @@
 import sys
 import time
-from typing import Callable, Optional
+from typing import Callable, Dict, Optional, Tuple
 
-_LAST_EXECUTION_TIME = {}
+# monotonic time in nanoseconds each call site last ran
+_LAST_EXECUTION_TIME: Dict[Tuple[str, int], int] = {}
 
 
 def rate_limit(
-    fun: Callable, period: Optional[float] = None, frequency: Optional[float] = None
+    fun: Callable,
+    period: Optional[float] = None,
+    frequency: Optional[float] = None,
+    *,
+    clock: Callable[[], int] = time.monotonic_ns,
 ) -> None:
     """
     Run the given callable every `period` seconds, or `frequency` times per second.
-    Either `period` or `frequency` must be set.
+    Either `period` or `frequency` must be set. At least a full period always
+    passes between runs.
 
     Example:
 
@@ -25,24 +31,39 @@ def rate_limit(
     within a file, so multiple calls to `rate_limit` say within a loop
     with the same callable and period will be treated separately. This allows
     for dynamic frequency manipulation.
+
+    `clock` is what the current time is read from, in integer nanoseconds.
+    A loop running many rate limited calls can read the time once per iteration
+    and share it with all of them:
+
+    ```python
+    while True:
+        now = time.monotonic_ns()
+        timing.rate_limit(send_position, frequency=10, clock=lambda: now)
+        timing.rate_limit(send_battery, period=1, clock=lambda: now)
+    ```
     """
     if frequency is not None:
         period = 1 / frequency
 
     assert period is not None
 
+    period_ns = round(period * 1e9)
+
     # in order to allow dynamic rate limits, record things based on the
     # file and line number it came from. Not impervious to live ast rewriting
     # but that seems unlikely
     frame = sys._getframe(1)
     context = frame.f_globals.get("__name__", frame.f_code.co_filename)
-    lineno = frame.f_lineno
-    instance = f"{context}:{lineno}"
-
-    # see if this instance has never run before, or too much time has elapsed
-    if (
-        instance not in _LAST_EXECUTION_TIME
-        or (time.time() - _LAST_EXECUTION_TIME[instance]) > period
-    ):
+    instance = (context, frame.f_lineno)
+
+    # monotonic by default, so the wall clock being adjusted can't stall or
+    # burst calls
+    now = clock()
+    last = _LAST_EXECUTION_TIME.get(instance)
+
+    # see if this instance has never run before, or enough time has elapsed
+    # since it last ran
+    if last is None or now - last >= period_ns:
         fun()
-        _LAST_EXECUTION_TIME[instance] = time.time()
+        _LAST_EXECUTION_TIME[instance] = now
@@ -1,73 +1,115 @@
+from __future__ import annotations
+
 import argparse
-import dataclasses
+import concurrent.futures
+import functools
+import io
 import json
 import os
 import pathlib
+import pickle
 import shlex
 import shutil
 import subprocess
 import sys
 import urllib.request
-from typing import Dict, List, Optional
-
-import jinja2
-import jsonref
-import yaml
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-try:
-    import tomllib  # type: ignore
-except ImportError:
-    import tomli as tomllib  # type: ignore
+if TYPE_CHECKING:
+    import jinja2
 
 THIS_DIR = pathlib.Path(__file__).parent
 MQTT_DIR = THIS_DIR.joinpath("bell", "avr", "mqtt")
 DOCS_DIR = THIS_DIR.joinpath("docs")
 DOCS_FAVICON = DOCS_DIR.joinpath("favicon.png")
+CACHE_DIR = THIS_DIR.joinpath(".build_cache")
+JINJA_CACHE_DIR = CACHE_DIR.joinpath("jinja")
+ASYNCAPI_CACHE = CACHE_DIR.joinpath("asyncapi.pickle")
+ASYNCAPI_JSON = CACHE_DIR.joinpath("asyncapi.json")
+# bump whenever the cached AsyncAPI data changes shape, e.g. how references
+# are resolved, so caches written by an older build.py are not reused
+ASYNCAPI_CACHE_VERSION = 1
 
 BASE_URL = os.getenv("BASE_URL", "")
 
+# indentation used for generated Python code
+INDENT = " " * 4
+
 
 ICON_URL = (
     "https://bellflight.github.io/AVR-Docs/BELL_Logo_AVR-Competition_RGB_081822-R00.png"
 )
 
+# AsyncAPI HTML template config, equivalent to
+# json.dumps({"expand": {"messageExamples": True}})
+DOCS_CONFIG_JSON = '{"expand": {"messageExamples": true}}'
+
 
-@dataclasses.dataclass
-class PropertyTypeHint:
+class PropertyTypeHint(NamedTuple):
     prepend_lines: List[str]
     """
     Lines that should be prepended to the generated code.
     """
-    type_checking: bool
-    """
-    If there is a seperate type hint if `TYPE_CHECKING` is true.
-    """
     type_hint: str
     """
-    The generated type hint.
+    The generated type hint. This is only the annotation, see `rhs`.
     """
-    type_checking_type_hint: Optional[str] = None
+    rhs: Optional[str] = None
     """
-    The generated type hint if `TYPE_CHECKING` is true.
+    The value assigned to the attribute, such as a `Field`, if there is one.
     """
-    core_type_hint: Optional[str] = None
+    has_default: bool = False
     """
-    The core variable type hint if in an array, such as an `int`.
+    If the assigned value provides a default.
     """
-    validator: bool = False
+
+
+@functools.lru_cache(maxsize=None)
+def template_env() -> jinja2.Environment:
     """
-    If a validator is required.
+    Jinja environment shared by everything that renders templates.
     """
-    validator_iter: Optional[str] = None
+    # imported here so that building the docs or asking for `--help`
+    # doesn't pay for it
+    import jinja2
+
+    # compiled templates are cached to disk so repeat builds skip parsing.
+    # Jinja checks the source checksum, so edited templates are still recompiled.
+    JINJA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    template_loader = jinja2.FileSystemLoader(searchpath=MQTT_DIR)
+    return jinja2.Environment(
+        loader=template_loader,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(directory=str(JINJA_CACHE_DIR)),
+        auto_reload=False,
+        cache_size=-1,
+        optimized=True,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_template(name: str) -> jinja2.Template:
     """
-    The iterator format to convert to for a validator. Can be a list or tuple.
+    Compiled template from the `bell/avr/mqtt` directory. Each template is only
+    loaded once per process.
     """
+    return template_env().get_template(name)
 
 
+@functools.lru_cache(maxsize=None)
 def create_name(parent: str, child: str) -> str:
     return (parent + child.title()).replace("_", "")
 
 
+# number schema keys that require a pydantic Field
+NUMBER_FIELD_KEYS = [
+    "default",
+    "minimum",
+    "maximum",
+    "exclusiveMinimum",
+    "exclusiveMaximum",
+]
+
+
 def type_hint_for_number_property(
     property_: Dict, name: str, parent_name: str, nested: bool = False
 ) -> PropertyTypeHint:
@@ -83,19 +125,9 @@ def type_hint_for_number_property(
         raise ValueError(f"Not a valid number type: {property_['type']}")
 
     # if there are no extras, just return the python type
-    if all(
-        p not in property_
-        for p in [
-            "default",
-            "minimum",
-            "maximum",
-            "exclusiveMinimum",
-            "exclusiveMaximum",
-        ]
-    ):
+    if all(p not in property_ for p in NUMBER_FIELD_KEYS):
         return PropertyTypeHint(
             prepend_lines=[],
-            type_checking=False,
             type_hint=python_type,
         )
 
@@ -106,48 +138,52 @@ def type_hint_for_number_property(
     if default is not None:
         field_value = f"default={default}"
 
-    output = f"{python_type} = Field({field_value}"
+    field_args = [field_value]
 
     # possible min value
     if "minimum" in property_:
-        output += f", ge={property_['minimum']}"
+        field_args.append(f"ge={property_['minimum']}")
     elif "exclusiveMinimum" in property_:
-        output += f", gt={property_['exclusiveMinimum']}"
+        field_args.append(f"gt={property_['exclusiveMinimum']}")
 
     # possible max value
     if "maximum" in property_:
-        output += f", le={property_['maximum']}"
+        field_args.append(f"le={property_['maximum']}")
     elif "exclusiveMaximum" in property_:
-        output += f", lt={property_['exclusiveMaximum']}"
+        field_args.append(f"lt={property_['exclusiveMaximum']}")
 
     # round it out and return
-    output += ")"
+    field = f"Field({', '.join(field_args)})"
 
-    # if we're nested and have constraints, return a child class
+    # if we're nested and have constraints, annotate the item type so
+    # pydantic-core enforces them natively while validating the container
     if nested:
+        # a standalone model is still generated for each constrained item, and
+        # instances of it are unwrapped to their plain value on the way in
         subclass_name = f"{create_name(parent_name, name)}Item"
+        type_hint = (
+            f"Annotated[Union[{python_type}, {subclass_name}], "
+            f"_RootItem({subclass_name})]"
+        )
         return PropertyTypeHint(
             prepend_lines=[
                 f"class {subclass_name}(PydanticRootModel):",
-                f"\troot: {output}",
+                f"{INDENT}root: {python_type} = {field}",
                 "",
-                f"\tdef __{python_type}__(self) -> {python_type}:",
-                "\t\treturn self.root",
+                f"{INDENT}def __{python_type}__(self) -> {python_type}:",
+                f"{INDENT}{INDENT}return self.root",
                 "",
                 "",
             ],
-            type_checking=True,
-            type_hint=subclass_name,
-            type_checking_type_hint=python_type,
-            core_type_hint=python_type,
-            validator=True,
+            type_hint=type_hint,
         )
 
     # return computed type hint
     return PropertyTypeHint(
         prepend_lines=[],
-        type_checking=False,
-        type_hint=output,
+        type_hint=python_type,
+        rhs=field,
+        has_default=default is not None,
     )
 
 
@@ -167,58 +203,90 @@ def type_hint_for_array_property(
 
     # basic type
     python_type = f"List[{sub_property_type_hint.type_hint}]"
-    python_type_checking_type = (
-        f"List[{sub_property_type_hint.type_checking_type_hint}]"
-    )
 
     if (
         "minItems" in property_
         and "maxItems" in property_
         and property_["minItems"] == property_["maxItems"]
     ):
-        # if there are a fixed number of items, use a Tuple
+        # if there are a fixed number of items, use a Tuple, which already
+        # enforces the length
         python_type = f"Tuple[{', '.join([sub_property_type_hint.type_hint] * property_['minItems'])}]"
-        python_type_checking_type = f"Tuple[{', '.join([sub_property_type_hint.type_checking_type_hint] * property_['minItems'])}]"
+
+        return PropertyTypeHint(
+            prepend_lines=sub_property_type_hint.prepend_lines,
+            type_hint=python_type,
+        )
 
     if "minItems" not in property_ and "maxItems" not in property_:
         # if just a basic list and nothing else, return
         return PropertyTypeHint(
             prepend_lines=sub_property_type_hint.prepend_lines,
-            type_checking=sub_property_type_hint.type_checking,
             type_hint=python_type,
-            type_checking_type_hint=python_type_checking_type,
-            core_type_hint=sub_property_type_hint.core_type_hint,
-            validator=sub_property_type_hint.validator,
-            validator_iter="list",
         )
 
     # otherwise, add a Field object
-    output = f"{python_type} = Field(..."
-    if sub_property_type_hint.type_checking:
-        output = f"conlist({sub_property_type_hint.type_hint}"
+    field_args = []
 
     # possible min value
     if "minItems" in property_:
-        output += f", min_length={property_['minItems']}"
+        field_args.append(f"min_length={property_['minItems']}")
 
     # possible max value
     if "maxItems" in property_:
-        output += f", max_length={property_['maxItems']}"
+        field_args.append(f"max_length={property_['maxItems']}")
 
-    # round it out and return
-    output += ")"
+    # nested arrays can't have an assigned value, so constrain the annotation
+    if nested:
+        return PropertyTypeHint(
+            prepend_lines=sub_property_type_hint.prepend_lines,
+            type_hint=f"Annotated[{python_type}, Field({', '.join(field_args)})]",
+        )
 
+    # round it out and return
     return PropertyTypeHint(
         prepend_lines=sub_property_type_hint.prepend_lines,
-        type_checking=sub_property_type_hint.type_checking,
-        type_hint=output,
-        type_checking_type_hint=python_type_checking_type,
-        core_type_hint=sub_property_type_hint.core_type_hint,
-        validator=True,
-        validator_iter="tuple",
+        type_hint=python_type,
+        rhs=f"Field({', '.join(['...'] + field_args)})",
     )
 
 
+_TYPE_HINT_CACHE: Dict[Tuple[str, bool, bool], PropertyTypeHint] = {}
+
+
+def _is_name_independent(property_: Dict, nested: bool) -> bool:
+    """
+    Whether the type hint for a property is the same no matter what the property
+    or parent is named. Objects and nested constrained numbers generate child
+    classes named after the property, so they are not.
+    """
+    if property_["type"] in ["string", "boolean"]:
+        return True
+
+    if property_["type"] in ["number", "integer"]:
+        return not nested or all(p not in property_ for p in NUMBER_FIELD_KEYS)
+
+    if property_["type"] == "array":
+        return _is_name_independent(property_["items"], nested=True)
+
+    return False
+
+
+def _type_hint_cache_key(
+    property_: Dict, required: bool, nested: bool
+) -> Optional[Tuple[str, bool, bool]]:
+    """
+    Return a cache key for properties whose type hint does not depend on the
+    property or parent name, or `None` if the property can't be cached.
+    """
+    if _is_name_independent(property_, nested):
+        # descriptions don't affect the type hint
+        schema = {k: v for k, v in property_.items() if k != "description"}
+        return json.dumps(schema, sort_keys=True), required, nested
+
+    return None
+
+
 def type_hint_for_property(
     property_: Dict, required: bool, name: str, parent_name: str, nested: bool = False
 ) -> PropertyTypeHint:
@@ -226,39 +294,55 @@ def type_hint_for_property(
     Given property data, return the type hint for a property, plus a
     possible list of extra lines that need to be added before the parent class.
     """
-    property_type_hint = PropertyTypeHint(
-        prepend_lines=[], type_checking=False, type_checking_type_hint="", type_hint=""
-    )
+    # identical leaf schemas show up across many messages, so reuse the result
+    cache_key = _type_hint_cache_key(property_, required, nested)
+    if cache_key in _TYPE_HINT_CACHE:
+        return _TYPE_HINT_CACHE[cache_key]
 
     if property_["type"] == "string":
         if "enum" in property_:
-            property_type_hint.type_hint = (
-                'Literal["' + '", "'.join(property_["enum"]) + '"]'
-            )
+            # json.dumps gives a properly quoted and escaped string literal
+            members = ", ".join(json.dumps(v) for v in property_["enum"])
+            type_hint = f"Literal[{members}]"
         else:
-            property_type_hint.type_hint = "str"
+            type_hint = "str"
 
+        rhs = None
         if "default" in property_:
-            property_type_hint.type_hint += f" = Field(default={property_['default']})"
+            rhs = f"Field(default={property_['default']})"
+
+        property_type_hint = PropertyTypeHint(
+            prepend_lines=[],
+            type_hint=type_hint,
+            rhs=rhs,
+            has_default=rhs is not None,
+        )
 
     elif property_["type"] in ["number", "integer"]:
-        subclass_name = create_name(parent_name, name)
         property_type_hint = type_hint_for_number_property(
             property_, nested=nested, name=name, parent_name=parent_name
         )
 
     elif property_["type"] == "boolean":
-        property_type_hint.type_hint = "bool"
+        type_hint = "bool"
 
+        rhs = None
         if "default" in property_:
-            property_type_hint.type_hint += f" = Field(default={property_['default']})"
+            rhs = f"Field(default={property_['default']})"
+
+        property_type_hint = PropertyTypeHint(
+            prepend_lines=[],
+            type_hint=type_hint,
+            rhs=rhs,
+            has_default=rhs is not None,
+        )
 
     elif property_["type"] == "object":
         subclass_name = create_name(parent_name, name)
-        (
-            property_type_hint.type_hint,
-            property_type_hint.prepend_lines,
-        ) = subclass_name, build_class_code(subclass_name, property_)
+        property_type_hint = PropertyTypeHint(
+            prepend_lines=build_class_code(subclass_name, property_),
+            type_hint=subclass_name,
+        )
 
     elif property_["type"] == "array":
         property_type_hint = type_hint_for_array_property(
@@ -268,14 +352,14 @@ def type_hint_for_property(
     else:
         raise ValueError(f'Cannot handle type: {property_["type"]}')
 
-    if not required and "Field(default=" not in property_type_hint.type_hint:
-        # if something has a default, don't actually use Optional[]
-        if "=" in property_type_hint.type_hint:
-            # in case the type hint has something it's equal to like a field
-            chunks = property_type_hint.type_hint.split(" =", maxsplit=1)
-            property_type_hint.type_hint = f"Optional[{chunks[0]}] = {chunks[1]}"
-        else:
-            property_type_hint.type_hint = f"Optional[{property_type_hint.type_hint}]"
+    # if something has a default, don't actually use Optional[]
+    if not required and not property_type_hint.has_default:
+        property_type_hint = property_type_hint._replace(
+            type_hint=f"Optional[{property_type_hint.type_hint}]"
+        )
+
+    if cache_key is not None:
+        _TYPE_HINT_CACHE[cache_key] = property_type_hint
 
     return property_type_hint
 
@@ -284,83 +368,117 @@ def build_class_code(class_name: str, class_data: dict) -> List[str]:
     assert class_data["type"] == "object"
     assert class_data["additionalProperties"] is False
 
-    output_lines = [
-        f"class {class_name}(BaseModel):",
-    ]
-
-    if "description" in class_data:
-        output_lines.extend(['\t"""', f'\t{class_data["description"]}', '\t"""', ""])
+    # lines for any child classes that need to be defined before this class
+    prepend_lines: List[str] = []
+    # data for each property to render into the class template
+    properties: List[dict] = []
+    required = set(class_data.get("required", ()))
+
+    for property_name, property_ in class_data.get("properties", {}).items():
+        # compute the type hint
+        property_type_hint = type_hint_for_property(
+            property_,
+            required=property_name in required,
+            name=property_name,
+            parent_name=class_name,
+        )
 
-    if "properties" in class_data:
-        for property_name in class_data["properties"]:
-            property_ = class_data["properties"][property_name]
+        # add extra lines first
+        prepend_lines.extend(property_type_hint.prepend_lines)
 
-            # compute the type hint
-            property_type_hint = type_hint_for_property(
-                property_,
-                required=property_name in class_data["required"],
-                name=property_name,
-                parent_name=class_name,
-            )
+        properties.append(
+            {
+                **property_type_hint._asdict(),
+                "name": property_name,
+                "description": property_.get("description"),
+            }
+        )
 
-            # add extra lines first
-            output_lines = property_type_hint.prepend_lines + output_lines
-
-            # add the type hint
-            if property_type_hint.type_checking:
-                output_lines.append("\tif TYPE_CHECKING:")
-                output_lines.append(
-                    f"\t\t{property_name}: {property_type_hint.type_checking_type_hint}"
-                )
-                output_lines.append("\telse:")
-                output_lines.append(
-                    f"\t\t{property_name}: {property_type_hint.type_hint}"
-                )
-            else:
-                output_lines.append(
-                    f"\t{property_name}: {property_type_hint.type_hint}"
-                )
-
-            # add a docstring if there is one
-            if "description" in property_:
-                output_lines.extend(['\t"""', "\t" + property_["description"], '\t"""'])
-
-            if property_type_hint.validator:
-                output_lines.extend(
-                    [
-                        f"\t@field_validator('{property_name}')",
-                        f"\tdef _validate_{property_name}(cls, v) -> {property_type_hint.validator_iter}: # pyright: ignore",
-                        "\t\t# Function to convert list of objects into simpler types",
-                        f"\t\treturn _convert_type(v, {property_type_hint.validator_iter}, {property_type_hint.core_type_hint})",
-                        "",
-                    ]
-                )
-    else:
-        output_lines.append("\tpass")
+    output = get_template("_payload_class.j2").render(
+        name=class_name,
+        description=class_data.get("description"),
+        properties=properties,
+    )
 
     # add a blank line at the end
-    output_lines.append("")
-    return output_lines
+    return prepend_lines + output.split("\n") + [""]
+
+
+def write_if_changed(path: pathlib.Path, content: str) -> None:
+    """
+    Write content to a file, unless the file already has exactly that content.
+    Leaving unchanged files alone keeps their modification time, so tools
+    downstream don't see them as changed.
+
+    Content is written as UTF-8 with `\\n` line endings on every platform, to a
+    temporary file that then replaces the original, so an interrupted build
+    never leaves a half-written module behind.
+    """
+    data = content.encode("utf-8")
+    if path.exists() and path.read_bytes() == data:
+        return
+
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+
+@functools.lru_cache(maxsize=1)
+def load_asyncapi() -> Tuple[dict, dict]:
+    """
+    Load the AsyncAPI spec, returning the raw data and the `components` section
+    with all references resolved. The result is cached to disk, keyed by the cache
+    version and the modification time and size of the spec, so unchanged specs skip
+    parsing entirely.
+    """
+    apispec = MQTT_DIR.joinpath("asyncapi.yml")
+    stat = apispec.stat()
+    key = (ASYNCAPI_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+    # use the cached data if the spec hasn't changed
+    # an unreadable cache is just rebuilt
+    try:
+        with open(ASYNCAPI_CACHE, "rb") as fp:
+            cached_key, raw_asyncapi_data, asyncapi_data = pickle.load(fp)
+
+        if cached_key == key:
+            return raw_asyncapi_data, asyncapi_data
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    # only needed when the cache is stale
+    import jsonref
+    import yaml
+
+    with open(apispec, "r") as fp:
+        # load the YML data
+        raw_asyncapi_data = yaml.load(fp, yaml.CSafeLoader)
+    # resolve all of the references up front, so the rest of the generator
+    # works with plain dicts rather than lazy jsonref proxies.
+    # Only the components are used resolved, so don't walk the channels.
+    asyncapi_data: dict = jsonref.replace_refs(
+        {"components": raw_asyncapi_data["components"]},
+        lazy_load=False,
+        proxies=False,
+    )  # type: ignore
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(ASYNCAPI_CACHE, "wb") as fp:
+        pickle.dump((key, raw_asyncapi_data, asyncapi_data), fp)
+
+    return raw_asyncapi_data, asyncapi_data
 
 
 def python_code() -> None:
     output_file = MQTT_DIR.joinpath("payloads.py")
 
     # read in the api spec
-    with open(MQTT_DIR.joinpath("asyncapi.yml"), "r") as fp:
-        # load the YML data
-        raw_asyncapi_data = yaml.load(fp, yaml.CLoader)
-        # convert to json so we can use jsonref
-        asyncapi_data: dict = jsonref.replace_refs(raw_asyncapi_data)  # type: ignore
+    raw_asyncapi_data, asyncapi_data = load_asyncapi()
 
     # first, build a dict of topics to class names
     topic_class: Dict[str, str] = {}
 
-    channels = raw_asyncapi_data["channels"]
-    for topic in channels:
-        # knab channel data
-        channel = channels[topic]
-
+    for topic, channel in raw_asyncapi_data["channels"].items():
         # make sure there is a publish or subscribe key underneath
         if "subscribe" in channel:
             topic_message = channel["subscribe"]
@@ -370,49 +488,45 @@ def python_code() -> None:
             raise ValueError(f"Publish or subscribe not found in channel {topic}")
 
         # parse out the class name
-        topic_class[topic] = topic_message["message"]["$ref"].split("/")[-1]
+        message_ref = topic_message["message"]["$ref"]
+        topic_class[topic] = message_ref.rsplit("/", maxsplit=1)[-1]
 
     # now, build the class for each topic
-    final_output_lines = (
-        MQTT_DIR.joinpath("_payloads_header.j2").read_text().splitlines()
-    )
+    # lines are written to a buffer as they are generated, rather than
+    # collecting every line of the file in a list first
+    output = io.StringIO()
+
+    def write_lines(lines: Iterable[str]) -> None:
+        output.writelines(f"{line}\n" for line in lines)
+
+    write_lines(MQTT_DIR.joinpath("_payloads_header.j2").read_text().splitlines())
 
     messages = asyncapi_data["components"]["messages"]
+    print(f"Building code for {len(messages)} messages: {', '.join(messages)}")
     for message in messages:
-        print(f"Building code for {message}")
-        final_output_lines.extend(
-            build_class_code(message, messages[message]["payload"])
-        )
+        write_lines(build_class_code(message, messages[message]["payload"]))
 
     # generate callables
-    for klass in set(topic_class.values()):
-        args = f", payload: {klass}"
-        if "EmptyMessage" in klass:
-            args = ""
+    # sorted so the generated file is the same from run to run
+    for klass in sorted(set(topic_class.values())):
+        args = "" if klass.endswith("EmptyMessage") else f", payload: {klass}"
 
-        final_output_lines.extend(
+        write_lines(
             (
                 f"class _{klass}Callable(Protocol):",
-                '\t"""',
-                "\tClass used only for type-hinting MQTT callbacks.",
-                '\t"""',
-                f"\tdef __call__(self{args}) -> Any:",
-                "\t\t...",
+                f'{INDENT}"""',
+                f"{INDENT}Class used only for type-hinting MQTT callbacks.",
+                f'{INDENT}"""',
+                f"{INDENT}def __call__(self{args}) -> Any:",
+                f"{INDENT}{INDENT}...",
                 "",
             )
         )
 
-    # convert tabs to spaces
-    final_output_lines = [i.replace("\t", "    ") for i in final_output_lines]
-
     # write out file
-    with open(output_file, "w") as fp:
-        fp.write("\n".join(final_output_lines))
+    write_if_changed(output_file, output.getvalue())
 
     # run jinja templates
-    template_loader = jinja2.FileSystemLoader(searchpath=MQTT_DIR)
-    template_env = jinja2.Environment(loader=template_loader)
-
     # for each file ending in .j2, render and write a .py file
     for template in MQTT_DIR.glob("*.j2"):
         # skip templates that start with an underscore
@@ -420,12 +534,25 @@ def python_code() -> None:
             continue
 
         print("Rendering", template)
-        with open(MQTT_DIR.joinpath(template.name.replace(".j2", ".py")), "w") as fp:
-            fp.write(
-                template_env.get_template(template.name).render(
-                    topic_class=topic_class,
-                )
-            )
+        write_if_changed(
+            MQTT_DIR.joinpath(template.name.replace(".j2", ".py")),
+            get_template(template.name).render(topic_class=topic_class),
+        )
+
+
+def download_favicon() -> None:
+    """
+    Stream the favicon to disk. This is written to a temporary file first, so a
+    failed download doesn't leave a partial favicon that looks complete.
+    """
+    partial_favicon = DOCS_FAVICON.with_name(f"{DOCS_FAVICON.name}.part")
+
+    with urllib.request.urlopen(ICON_URL, timeout=10) as response, open(
+        partial_favicon, "wb"
+    ) as fp:
+        shutil.copyfileobj(response, fp, length=1 << 16)
+
+    os.replace(partial_favicon, DOCS_FAVICON)
 
 
 def docs() -> None:
@@ -440,34 +567,69 @@ def docs() -> None:
         elif item.is_dir():
             shutil.rmtree(item)
 
-    # download the favicon
-    if not DOCS_FAVICON.exists():
-        urllib.request.urlretrieve(ICON_URL, DOCS_FAVICON)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        # download the favicon in the background while the Python docs build.
+        # pdoc only links to it, the asyncapi generator needs the file.
+        favicon_download = None
+        if not DOCS_FAVICON.exists():
+            favicon_download = executor.submit(download_favicon)
 
-    # build Python docs
-    python_docs()
+        # build Python docs
+        python_docs()
+
+        if favicon_download is not None:
+            favicon_download.result()
 
     # build asyncapi docs
     # This must come second.
     mqtt_docs()
 
 
-def mqtt_docs() -> None:
-    apispec = MQTT_DIR.joinpath("asyncapi.yml")
+@functools.lru_cache(maxsize=1)
+def _package_version() -> str:
+    """
+    Package version from `pyproject.toml`.
+    """
+    # only needed for docs, so avoid importing this for regular code builds
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib  # type: ignore
 
     with open(THIS_DIR.joinpath("pyproject.toml"), "rb") as fp:
         pyproject = tomllib.load(fp)
 
+    return pyproject["tool"]["poetry"]["version"]
+
+
+@functools.lru_cache(maxsize=1)
+def _npx() -> str:
+    """
+    Full path to the `npx` executable. This is looked up once, as `shutil.which`
+    has to search every directory on the `PATH`.
+    """
     # required for Windows because `npx` is a cmd script
     npx = shutil.which("npx")
     assert npx is not None
+    return npx
+
+
+def mqtt_docs() -> None:
+    # hand the generator the already loaded spec as JSON, so it doesn't need to
+    # parse the YAML again. References are left in place so messages keep
+    # their component names in the docs.
+    raw_asyncapi_data, _ = load_asyncapi()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    ASYNCAPI_JSON.write_text(json.dumps(raw_asyncapi_data))
+
+    npx = _npx()
 
     output_dir = DOCS_DIR.joinpath("bell", "avr", "mqtt", "asyncapi")
 
     cmd = [
         npx,
         "ag",  # asyncapi generator
-        str(apispec.absolute()),  # asyncapi spec
+        str(ASYNCAPI_JSON.absolute()),  # asyncapi spec
         "@asyncapi/html-template",  # html template
         "--output",
         str(output_dir.absolute()),  # output directory
@@ -475,11 +637,11 @@ def mqtt_docs() -> None:
         # "--param", # no longer needed
         # "baseHref=''",
         "--param",
-        f'version={pyproject["tool"]["poetry"]["version"]}',  # version
+        f"version={_package_version()}",  # version
         "--param",
         f"favicon={DOCS_FAVICON.absolute()}",
         "--param",
-        f"config={json.dumps({'expand': {'messageExamples': True}})}",
+        f"config={DOCS_CONFIG_JSON}",
     ]
 
     print("Building AsyncAPI docs")
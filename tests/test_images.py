@@ -11,6 +11,16 @@ from bell.avr.utils import images
         (np.array([[1, 2], [3, 4]]), True),
         (np.array([[[1, 2], [3, 4]], [[5, 6], [7, 8]]]), False),
         (np.array([[[1, 2], [3, 4]], [[5, 6], [7, 8]]]), True),
+        (np.array([[1.0, 2.0], [3.0, 4.0]]), False),
+        (np.array([[1, 2], [3, 4]], dtype=np.uint8), True),
+        (
+            np.random.default_rng(0).integers(0, 256, (1024, 1024, 3), dtype=np.uint8),
+            False,
+        ),
+        (
+            np.random.default_rng(1).integers(0, 256, (1024, 1024, 3), dtype=np.uint8),
+            True,
+        ),
     ],
 )
 def test_serialization(in_image: np.ndarray, compress: bool) -> None:
@@ -22,3 +32,19 @@ def test_serialization(in_image: np.ndarray, compress: bool) -> None:
     print(in_image)
     print(out_image)
     np.testing.assert_array_equal(in_image, out_image)
+
+
+@pytest.mark.parametrize(
+    "in_image",
+    [
+        np.array([[-1, 2], [3, 4]]),
+        np.array([[1, 2], [3, 256]]),
+        np.array([[1, 2], [3, np.nan]]),
+        np.array([[1, 2], [3, 256]], dtype=np.uint16),
+        np.array([[1.0, 2.0], [3.0, -0.6]]),
+    ],
+)
+def test_serialization_out_of_range(in_image: np.ndarray) -> None:
+    # values that don't fit in a byte can't be serialized
+    with pytest.raises(ValueError):
+        images.serialize_image(in_image)
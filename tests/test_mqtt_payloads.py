@@ -26,8 +26,8 @@ def test_root_model_fail(value: int) -> None:
 
 
 def test_root_model_container() -> None:
-    # Test that the validator of a class which contains a list of root model
-    # objects properly converts types
+    # Test that a class with constrained items in a container gives back the
+    # plain values in the right container type
     from bell.avr.mqtt.payloads import AVRPCMColorSet
 
     # make sure we actually get a tuple back
@@ -36,3 +36,61 @@ def test_root_model_container() -> None:
 
     # make sure the tuple contains ints
     assert isinstance(color_set.wrgb[0], int)
+
+
+@pytest.mark.parametrize(
+    "wrgb", ((1, 2, 3, -1), (1, 2, 3, 256), (1, 2, 3, 123.45), (1, 2, 3))
+)
+def test_root_model_container_fail(wrgb: tuple) -> None:
+    # Test that the item constraints are still enforced inside the container
+    from bell.avr.mqtt.payloads import AVRPCMColorSet
+
+    with pytest.raises(ValueError):
+        AVRPCMColorSet(wrgb=wrgb)  # pyright: ignore
+
+
+def test_root_model_container_items() -> None:
+    # Test that root model instances are still accepted as container items,
+    # and are unwrapped to their plain values
+    from bell.avr.mqtt.payloads import (
+        AVRPCMColorSet,
+        AVRPCMColorSetWrgbItem,
+        AVRVIOImageCapture,
+        AVRVIOImageCaptureShapeItem,
+    )
+
+    color_set = AVRPCMColorSet(
+        wrgb=(AVRPCMColorSetWrgbItem(1), 2, AVRPCMColorSetWrgbItem(3), 4)
+    )
+    assert color_set.wrgb == (1, 2, 3, 4)
+    assert all(type(item) is int for item in color_set.wrgb)
+
+    image_capture = AVRVIOImageCapture(
+        data="",
+        side="left",
+        shape=[AVRVIOImageCaptureShapeItem(2), AVRVIOImageCaptureShapeItem(3)],
+        compressed=False,
+    )
+    assert image_capture.shape == [2, 3]
+    assert all(type(item) is int for item in image_capture.shape)
+
+
+def test_root_model_names() -> None:
+    # every constrained item gets its own root model class, named after its
+    # own message, even when the constraints are the same as another's
+    from bell.avr.mqtt.payloads import (
+        AVRAprilTagsRawApriltagsRotationItem,
+        AVRPCMColorSetWrgbItem,
+        AVRPCMColorTimedWrgbItem,
+        AVRThermalReadingShapeItem,
+        AVRVIOImageCaptureShapeItem,
+    )
+
+    for klass, name in (
+        (AVRAprilTagsRawApriltagsRotationItem, "AVRAprilTagsRawApriltagsRotationItem"),
+        (AVRPCMColorSetWrgbItem, "AVRPCMColorSetWrgbItem"),
+        (AVRPCMColorTimedWrgbItem, "AVRPCMColorTimedWrgbItem"),
+        (AVRThermalReadingShapeItem, "AVRThermalReadingShapeItem"),
+        (AVRVIOImageCaptureShapeItem, "AVRVIOImageCaptureShapeItem"),
+    ):
+        assert klass.__name__ == name
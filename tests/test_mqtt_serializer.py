@@ -1,3 +1,4 @@
+import copy
 from typing import Any
 
 import pytest
@@ -5,28 +6,34 @@ import pytest
 from bell.avr.mqtt.payloads import AVREmptyMessage, AVRPCMServo
 from bell.avr.mqtt.serializer import deserialize_payload, serialize_payload
 
+# shared between test cases, which also makes sure the serializer never
+# modifies what it's given
+_SERVO_2 = AVRPCMServo(servo=2)
+_SERVO_DICT = {"servo": 2}
+_EMPTY = AVREmptyMessage()
+
 
 @pytest.mark.parametrize(
     "topic, payload, expected",
     [
         (  # pydantic class for a known topic
             "avr/pcm/servo/open",
-            AVRPCMServo(servo=2),
+            _SERVO_2,
             '{"servo":2}',
         ),
         (  # pydantic class for an unknown topic
             "notreal",
-            AVRPCMServo(servo=2),
+            _SERVO_2,
             '{"servo":2}',
         ),
         (  # dict for a known topic
             "avr/pcm/servo/open",
-            {"servo": 2},
+            _SERVO_DICT,
             '{"servo":2}',
         ),
         (  # dict for an unknown topic
             "notreal",
-            {"servo": 2},
+            _SERVO_DICT,
             '{"servo": 2}',
         ),
         (  # json string for a known topic
@@ -71,12 +78,12 @@ from bell.avr.mqtt.serializer import deserialize_payload, serialize_payload
         ),
         (  # empty payload for a known topic
             "avr/pcm/laser/fire",
-            AVREmptyMessage(),
+            _EMPTY,
             "{}",
         ),
         (  # empty payload for an unknown topic
             "notreal",
-            AVREmptyMessage(),
+            _EMPTY,
             "{}",
         ),
         (  # unexepcted payload for an unknown topic
@@ -84,10 +91,17 @@ from bell.avr.mqtt.serializer import deserialize_payload, serialize_payload
             False,
             "false",
         ),
+        (  # dict with non-string keys for an unknown topic
+            "notreal",
+            {1: 2},
+            '{"1": 2}',
+        ),
     ],
 )
 def test_serialize_payload(topic: str, payload: Any, expected: str) -> None:
+    original = copy.deepcopy(payload)
     assert serialize_payload(topic, payload) == expected
+    assert payload == original
 
 
 @pytest.mark.parametrize(
@@ -95,7 +109,7 @@ def test_serialize_payload(topic: str, payload: Any, expected: str) -> None:
     [
         (  # pydantic class for wrong topic
             "avr/fcm/position/local",
-            AVRPCMServo(servo=2),
+            _SERVO_2,
         ),
         (  # pydantic validation error from dict
             "avr/fcm/position/local",
@@ -108,7 +122,7 @@ def test_serialize_payload(topic: str, payload: Any, expected: str) -> None:
         ("doesntmatter", '{"n": 1, "e":'),  # invalid json string
         (  # dict for wrong topic
             "avr/fcm/position/local",
-            {"servo": 2},
+            _SERVO_DICT,
         ),
         (  # nothing for wrong topic
             "avr/fcm/position/local",
@@ -131,49 +145,58 @@ def test_serialize_payload_exception(topic: str, payload: Any) -> None:
         (  # json string for a known topic
             "avr/pcm/servo/open",
             b'{"servo": 2}',
-            AVRPCMServo(servo=2),
+            _SERVO_2,
         ),
         (  # empty json string for a known topic
             "avr/pcm/laser/fire",
             b"{}",
-            AVREmptyMessage(),
+            _EMPTY,
         ),
         (  # empty string for a known topic
             "avr/pcm/laser/fire",
             b"",
-            AVREmptyMessage(),
+            _EMPTY,
         ),
         (  # no payload for a known topic
             "avr/pcm/laser/fire",
             None,
-            AVREmptyMessage(),
+            _EMPTY,
         ),
         (  # json string for an unknown topic
             "notreal",
             b'{"servo": 2}',
-            {"servo": 2},
+            _SERVO_DICT,
         ),
         (  # empty json string for an unknown topic
             "notreal",
             b"{}",
-            AVREmptyMessage(),
+            _EMPTY,
         ),
         (  # empty string for an unknown topic
             "notreal",
             b"",
-            AVREmptyMessage(),
+            _EMPTY,
         ),
         (  # no payload for an unknown topic
             "notreal",
             None,
-            AVREmptyMessage(),
+            _EMPTY,
         ),
     ],
 )
-def test_deserialize_payload(topic: str, payload: Any, expected: str) -> None:
+def test_deserialize_payload(topic: str, payload: Any, expected: Any) -> None:
     assert deserialize_payload(topic, payload) == expected
 
 
+def test_deserialize_payload_empty_shared() -> None:
+    # empty messages are frozen, so the same instance is handed out every time
+    result = deserialize_payload("avr/pcm/laser/fire", b"")
+    assert isinstance(result, AVREmptyMessage)
+    assert result.model_config.get("frozen") is True
+    assert deserialize_payload("avr/pcm/laser/fire", b"{}") is result
+    assert deserialize_payload("avr/pcm/laser/fire", b"") is result
+
+
 @pytest.mark.parametrize(
     "topic, payload",
     [
@@ -185,6 +208,10 @@ def test_deserialize_payload(topic: str, payload: Any, expected: str) -> None:
             "avr/pcm/servo/open",
             b"{}",
         ),
+        (  # not a json object for a known topic
+            "avr/pcm/servo/open",
+            b"[2]",
+        ),
         (  # invalid json
             "notreal",
             b"abc",
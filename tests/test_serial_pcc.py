@@ -63,3 +63,20 @@ def test_set_laser_off(pcc: PeripheralControlComputer) -> None:
 def test_check_servo_controller(pcc: PeripheralControlComputer) -> None:
     pcc.check_servo_controller()
     pcc.ser.write.assert_called_once_with(b"$P<\x00\x01\x0b\x1b")
+
+
+def test_calc_crc(pcc: PeripheralControlComputer) -> None:
+    # compare the lookup table against the bit-by-bit calculation
+    def crc8_dvb_s2(crc: int, a: int) -> int:
+        crc ^= a
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0xD5) % 256 if crc & 0x80 else (crc << 1) % 256
+        return crc
+
+    data = bytes(range(256)) + b"$P<\x00\x05\x05\x01\x02\x03\x04"
+
+    expected = 0
+    for a in data:
+        expected = crc8_dvb_s2(expected, a)
+
+    assert pcc._calc_crc(data, len(data)) == expected
@@ -1,8 +1,14 @@
-import time
+from typing import Callable, Iterable
 
 from bell.avr.utils.timing import rate_limit
 
 
+def fake_clock(times: Iterable[float]) -> Callable[[], int]:
+    # clock that returns the given times in seconds, one per call, as nanoseconds
+    times_ns = iter([round(t * 1e9) for t in times])
+    return lambda: next(times_ns)
+
+
 def test_rate_limit_period() -> None:
     # create a counter starting at 0
     counter = 0
@@ -15,11 +21,11 @@ def test_rate_limit_period() -> None:
     # make sure counter starts at 0
     assert counter == 0
 
-    # run loop 4 times
+    # run loop 4 times, 0.2 seconds apart
+    clock = fake_clock([0, 0.2, 0.4, 0.6])
     for _ in range(4):
         # run every half second
-        rate_limit(add, period=0.5)
-        time.sleep(0.2)
+        rate_limit(add, period=0.5, clock=clock)
 
     # make sure the counter only incremented 2 times
     assert counter == 2
@@ -37,11 +43,41 @@ def test_rate_limit_frequency() -> None:
     # make sure counter starts at 0
     assert counter == 0
 
-    # run loop 4 times
+    # run loop 4 times, 0.2 seconds apart
+    clock = fake_clock([0, 0.2, 0.4, 0.6])
     for _ in range(4):
         # run twice a second
-        rate_limit(add, frequency=2)
-        time.sleep(0.2)
+        rate_limit(add, frequency=2, clock=clock)
 
     # make sure the counter only incremented 2 times
     assert counter == 2
+
+
+def test_rate_limit_full_period() -> None:
+    counter = 0
+
+    def add() -> None:
+        nonlocal counter
+        counter += 1
+
+    # a late run is followed by a full period before the next one
+    clock = fake_clock([0, 0.9, 1.0, 1.3])
+    for _ in range(4):
+        rate_limit(add, period=0.5, clock=clock)
+
+    assert counter == 2
+
+
+def test_rate_limit_no_catch_up() -> None:
+    counter = 0
+
+    def add() -> None:
+        nonlocal counter
+        counter += 1
+
+    # missed periods aren't made up for with a burst of runs
+    clock = fake_clock([0, 2.0, 2.1, 2.2])
+    for _ in range(4):
+        rate_limit(add, period=0.5, clock=clock)
+
+    assert counter == 2